@@ -21,6 +21,36 @@ class Settings:
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
 
+    # Near-duplicate chunk detection (SimHash, 64-bit)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+    DEDUP_SHINGLE_SIZE = 3
+    DEDUP_MIN_JACCARD = float(os.getenv("DEDUP_MIN_JACCARD", "0.9"))
+
+    # LLM admission control (see app/services/llm_scheduler.py)
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+    LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "5"))
+    LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "20"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+    LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+    LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+    # Intent routing (cosine similarity to prototype questions)
+    # A profile fact is answered without retrieval only when its best
+    # prototype scores >= INTENT_FACT_THRESHOLD and beats the best DOCUMENT /
+    # GENERAL prototype by INTENT_MARGIN. 0.65 is a conservative starting
+    # point for all-MiniLM-L6-v2 (close paraphrases score ~0.7-0.9); re-check
+    # with tests/test_intent_router.py after changing the model or prototypes.
+    INTENT_FACT_THRESHOLD = float(os.getenv("INTENT_FACT_THRESHOLD", "0.65"))
+    INTENT_MARGIN = float(os.getenv("INTENT_MARGIN", "0.05"))
+
+    # Profiling (see app/services/profiler.py)
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.01"))
+    PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+    SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "3000"))
+    SLOW_REQUEST_BUFFER = int(os.getenv("SLOW_REQUEST_BUFFER", "20"))
+
     # --- THE GOLDEN CONTEXT (Cheat Sheet) ---
     # These facts are ALWAYS fed to the AI, ensuring it knows the basics.
     COLLEGE_PROFILE = """
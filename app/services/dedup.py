@@ -0,0 +1,126 @@
+# app/services/dedup.py
+import re
+import hashlib
+from typing import List, Dict
+
+from app.config import settings
+
+
+class SimHashDeduplicator:
+    """
+    Near-duplicate chunk detector based on 64-bit SimHash.
+
+    Each chunk is fingerprinted from its word shingles. Candidates are found
+    through LSH bands: the fingerprint is split into `max_distance + 1` bands,
+    so any pair within `max_distance` bits shares at least one identical band
+    (pigeonhole) and only those pairs are compared. A candidate within the
+    distance is only merged once the exact shingle Jaccard similarity reaches
+    `min_jaccard`; SimHash alone conflates templated pages (e.g. two
+    department pages) that differ only in a few key words.
+    """
+
+    BITS = 64
+
+    def __init__(self, max_distance: int = None, shingle_size: int = None, min_jaccard: float = None):
+        self.max_distance = settings.DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+        self.shingle_size = shingle_size or settings.DEDUP_SHINGLE_SIZE
+        self.min_jaccard = settings.DEDUP_MIN_JACCARD if min_jaccard is None else min_jaccard
+        self.num_bands = self.max_distance + 1
+        self.band_bits = self.BITS // self.num_bands
+
+    # -------------------------
+    # Fingerprinting
+    # -------------------------
+    def _shingles(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", (text or "").lower())
+        if len(words) <= self.shingle_size:
+            return [" ".join(words)] if words else []
+        return [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def _hash(self, token: str) -> int:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def fingerprint(self, text: str, shingles: set = None) -> int:
+        if shingles is None:
+            shingles = set(self._shingles(text))
+        weights = [0] * self.BITS
+        for shingle in shingles:
+            h = self._hash(shingle)
+            for bit in range(self.BITS):
+                weights[bit] += 1 if (h >> bit) & 1 else -1
+
+        fp = 0
+        for bit in range(self.BITS):
+            if weights[bit] > 0:
+                fp |= 1 << bit
+        return fp
+
+    def _bands(self, fp: int):
+        mask = (1 << self.band_bits) - 1
+        for i in range(self.num_bands):
+            yield i, (fp >> (i * self.band_bits)) & mask
+
+    @staticmethod
+    def distance(a: int, b: int) -> int:
+        return bin(a ^ b).count("1")
+
+    @staticmethod
+    def jaccard(a: set, b: set) -> float:
+        if not a and not b:
+            return 1.0
+        return len(a & b) / len(a | b)
+
+    # -------------------------
+    # Dedup
+    # -------------------------
+    def dedupe(self, docs: List["Document"]) -> List["Document"]:
+        """
+        Collapse near-duplicate documents into the first occurrence.
+        The kept document's metadata gets a `sources` list naming every file
+        the chunk was seen in (`source` stays the first one) and a `duplicates`
+        list holding the full metadata of each collapsed copy.
+        """
+        kept = []
+        fingerprints = []
+        shingle_sets = []
+        buckets: Dict[tuple, List[int]] = {}
+
+        for doc in docs:
+            shingles = set(self._shingles(doc.page_content or ""))
+            fp = self.fingerprint(doc.page_content, shingles)
+
+            match = None
+            seen = set()
+            for band in self._bands(fp):
+                for idx in buckets.get(band, []):
+                    if idx in seen:
+                        continue
+                    seen.add(idx)
+                    if self.distance(fp, fingerprints[idx]) > self.max_distance:
+                        continue
+                    # band hit is only a candidate; confirm on the actual shingles
+                    if self.jaccard(shingles, shingle_sets[idx]) >= self.min_jaccard:
+                        match = idx
+                        break
+                if match is not None:
+                    break
+
+            src = doc.metadata.get("source")
+            if match is not None:
+                meta = kept[match].metadata
+                meta["duplicates"].append(dict(doc.metadata))
+                if src and src not in meta["sources"]:
+                    meta["sources"].append(src)
+                continue
+
+            doc.metadata["sources"] = [src] if src else []
+            doc.metadata["duplicates"] = []
+            idx = len(kept)
+            kept.append(doc)
+            fingerprints.append(fp)
+            shingle_sets.append(shingles)
+            for band in self._bands(fp):
+                buckets.setdefault(band, []).append(idx)
+
+        return kept
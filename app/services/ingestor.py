@@ -18,6 +18,8 @@ except:
         Document = Any
 
 from app.config import settings
+from app.services.dedup import SimHashDeduplicator
+from app.services.profiler import stage
 
 FILEMAP_PATH = os.path.join(settings.BASE_DIR, "data", "file_maps.json")
 
@@ -29,6 +31,7 @@ class IngestionService:
             chunk_overlap=settings.CHUNK_OVERLAP,
             separators=["\n\n", "\n", ".", " ", ""]
         )
+        self.deduplicator = SimHashDeduplicator()
 
     def clean_text(self, text: str) -> str:
         text = re.sub(r'\s+', ' ', text or '')
@@ -106,15 +109,27 @@ class IngestionService:
 
     def build_vector_store(self):
         print("[INGEST] Loading & chunking...")
-        docs = self.load_and_chunk()
+        with stage("load_and_chunk"):
+            docs = self.load_and_chunk()
         if not docs:
             print("[INGEST] No docs found for indexing.")
-            return
+            return {"chunks": 0, "unique_chunks": 0, "dedup_ratio": 0.0}
+
+        total = len(docs)
+        if settings.DEDUP_ENABLED:
+            with stage("dedup"):
+                docs = self.deduplicator.dedupe(docs)
+        dedup_ratio = round(1 - len(docs) / total, 4)
+        print(f"[INGEST] Dedup: {total} chunks -> {len(docs)} unique ({dedup_ratio:.1%} removed)")
+
         print(f"[INGEST] Creating embeddings for {len(docs)} chunks...")
-        vector_store = FAISS.from_documents(docs, self.embeddings)
-        vector_store.save_local(settings.VECTOR_DB_DIR)
+        with stage("embed_and_index"):
+            vector_store = FAISS.from_documents(docs, self.embeddings)
+            vector_store.save_local(settings.VECTOR_DB_DIR)
         print("[INGEST] Vector store saved.")
         # debug
         debug_path = os.path.join(settings.CLEAN_DATA_DIR, "chunks.json")
         with open(debug_path, "w", encoding="utf-8") as f:
             json.dump([{"content": d.page_content, "meta": d.metadata} for d in docs], f, indent=2, ensure_ascii=False)
+
+        return {"chunks": total, "unique_chunks": len(docs), "dedup_ratio": dedup_ratio}
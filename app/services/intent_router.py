@@ -0,0 +1,183 @@
+# app/services/intent_router.py
+import math
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+
+DOCUMENT = "document"
+GENERAL = "general"
+PROFILE = "profile"
+
+# Example phrasings per intent. They are embedded once and each query is
+# scored against them with the embedding RAGService already computed.
+DOCUMENT_PROTOTYPES = [
+    "download the syllabus pdf",
+    "send me the fee structure document",
+    "give me the college prospectus",
+    "share the admission brochure",
+    "show me the seat matrix",
+    "I need the list of HODs",
+    "can I get the curriculum and scheme file",
+    "where can I find the vacant seats list",
+    "open the timetable pdf",
+    "give me the notice about exams",
+]
+
+GENERAL_PROTOTYPES = [
+    "what are the admission dates",
+    "how do I apply for admission",
+    "how much is the fee for computer engineering",
+    "tell me about placements",
+    "what facilities does the college have",
+    "is there a hostel on campus",
+    "when do the exams start",
+    "what is the eligibility for first year engineering",
+    "which companies visit for recruitment",
+    "how many seats are there in each branch",
+]
+
+# Questions answered by a single line of settings.COLLEGE_PROFILE.
+# Keys must match the labels used in the profile text.
+FACT_PROTOTYPES = {
+    "Name of Institute": ["what is the name of the college", "what is the full form of SYCET"],
+    "Principal": ["who is the principal", "principal of the college name"],
+    "Academic Dean": ["who is the academic dean", "dean of academics name"],
+    "President/Chairman": ["who is the chairman of the college", "who is the president of the institute"],
+    "Departments/Branches Offered": [
+        "which branches are offered",
+        "what departments does the college have",
+        "list of engineering courses available",
+    ],
+    "Address": ["what is the college address", "where is the college located"],
+    "Contact": ["what is the college phone number", "how can I contact the college"],
+    "Website": ["what is the college website", "official website link"],
+}
+
+# Words that point a fact-style question at someone/something other than the
+# institute as a whole ("principal of the polytechnic", "HOD of CSE"). Such
+# queries go through retrieval + LLM instead of the profile shortcut.
+OTHER_ENTITY_PATTERN = re.compile(
+    r"\b(hod|hods|head of|polytechnic|diploma|pharmacy|mba|mca|school|junior college|university|"
+    r"cse|computer|ai|aiml|ml|civil|mechanical|electrical|electronics|e&tc|entc|5g|vlsi|data science|ds)\b",
+    re.IGNORECASE,
+)
+
+
+def parse_profile(profile: str) -> Dict[str, str]:
+    """
+    Turn the COLLEGE_PROFILE block into {label: value}.
+    Bullet lines ("- CSE") are appended to the preceding label.
+    """
+    facts = {}
+    current = None
+    for raw in (profile or "").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("["):
+            continue
+        if line.startswith("- ") and current:
+            facts[current] = (facts[current] + ", " if facts[current] else "") + line[2:].strip()
+            continue
+        match = re.match(r"^([^:]+):\s*(.*)$", line)
+        if match:
+            current = match.group(1).strip()
+            facts[current] = match.group(2).strip().rstrip(".")
+    return facts
+
+
+class IntentRouter:
+    """
+    Nearest-prototype intent classifier over sentence embeddings.
+
+    route(q_emb) returns {"intent", "score", "fact"} where intent is one of
+    DOCUMENT / GENERAL / PROFILE and `fact` is the profile label for PROFILE.
+    Prototype embeddings are computed lazily on first use.
+    """
+
+    def __init__(self, embed_documents: Callable[[List[str]], List[List[float]]], profile: str = None):
+        self.embed_documents = embed_documents
+        self.facts = parse_profile(settings.COLLEGE_PROFILE if profile is None else profile)
+        self.fact_threshold = settings.INTENT_FACT_THRESHOLD
+        self.margin = settings.INTENT_MARGIN
+        self._prototypes = None  # [(intent, fact_label, unit_vector)]
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vec):
+        norm = math.sqrt(sum(x * x for x in vec))
+        if norm == 0:
+            return None
+        return [x / norm for x in vec]
+
+    def _load_prototypes(self):
+        labelled = [(DOCUMENT, None, p) for p in DOCUMENT_PROTOTYPES]
+        labelled += [(GENERAL, None, p) for p in GENERAL_PROTOTYPES]
+        for label, phrases in FACT_PROTOTYPES.items():
+            if label in self.facts:
+                labelled += [(PROFILE, label, p) for p in phrases]
+
+        vectors = self.embed_documents([p for _, _, p in labelled])
+        prototypes = []
+        for (intent, fact, _), vec in zip(labelled, vectors):
+            unit = self._normalize(list(vec))
+            if unit is not None:
+                prototypes.append((intent, fact, unit))
+        # publish the finished list in one assignment so readers never see it half-built
+        self._prototypes = prototypes
+
+    def _get_prototypes(self):
+        if self._prototypes is None:
+            with self._load_lock:
+                if self._prototypes is None:
+                    try:
+                        self._load_prototypes()
+                    except Exception as e:
+                        # stay None so the next request retries
+                        print(f"[INTENT] Prototype embedding failed: {e}")
+        return self._prototypes
+
+    def route(self, q_emb) -> Optional[dict]:
+        if not q_emb:
+            return None
+        prototypes = self._get_prototypes()
+        q = self._normalize(q_emb)
+        if q is None or not prototypes:
+            return None
+
+        # best prototype per intent; for PROFILE it also names the matched fact
+        best = {}
+        for intent, fact, proto in prototypes:
+            score = sum(a * b for a, b in zip(q, proto))
+            if intent not in best or score > best[intent]["score"]:
+                best[intent] = {"intent": intent, "score": score, "fact": fact}
+
+        ranked = sorted(best.values(), key=lambda r: r["score"], reverse=True)
+        top = ranked[0]
+        runner_up = ranked[1]["score"] if len(ranked) > 1 else -1.0
+
+        # profile facts skip retrieval entirely, so require a confident, clear
+        # win over DOCUMENT/GENERAL (thresholds: see INTENT_FACT_THRESHOLD)
+        if top["intent"] == PROFILE:
+            if top["score"] >= self.fact_threshold and top["score"] - runner_up >= self.margin:
+                return top
+            top = next(r for r in ranked if r["intent"] != PROFILE)
+
+        return top
+
+    def can_answer_directly(self, query: str, history: list = None) -> bool:
+        """
+        Guard for the PROFILE shortcut, which replies with a fixed English
+        line. Only used for a first-turn question in plain ASCII (other
+        languages need the LLM to reply in kind, follow-ups need history)
+        that does not name another body or department.
+        """
+        if history:
+            return False
+        query = query or ""
+        if not query.isascii():
+            return False
+        return OTHER_ENTITY_PATTERN.search(query) is None
+
+    def answer_fact(self, fact: str) -> str:
+        return f"{fact}: {self.facts.get(fact, '')}."
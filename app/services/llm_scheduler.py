@@ -0,0 +1,203 @@
+# app/services/llm_scheduler.py
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable
+
+from app.config import settings
+from app.services.profiler import slow_sampler
+
+
+class LLMUnavailable(RuntimeError):
+    """Raised when the scheduler gives up on an LLM call (model errors, breaker open, model not configured)."""
+
+
+class LLMOverloaded(LLMUnavailable):
+    """Raised when the call is shed for load: queue full, queue deadline or call timeout."""
+
+
+# HTTP statuses worth retrying: rate limited or server-side trouble
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def is_transient_error(exc: Exception) -> bool:
+    """
+    True for failures that say nothing about the request itself: network
+    timeouts/connection errors and 408/429/5xx API errors (google.api_core
+    exceptions carry the HTTP status in `.code`). Request-specific errors
+    such as a safety-blocked response (ValueError on `resp.text`) or a 400
+    invalid argument are not transient.
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(exc, "code", None)
+    return isinstance(code, int) and code in TRANSIENT_STATUS
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for `cooldown`
+    seconds. After the cooldown a single trial call is let through (half-open);
+    success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release_trial(self):
+        with self._lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+class LLMScheduler:
+    """
+    Admission control in front of a blocking LLM call.
+
+    - at most `max_concurrency` calls run at once (semaphore)
+    - at most `max_queue` callers wait for a slot; more are rejected immediately
+    - a waiting caller gives up after `queue_timeout` seconds
+    - each call is abandoned after `call_timeout` seconds (its slot stays held
+      until the underlying call actually returns, so the cap is never exceeded)
+    - transient failures (see is_transient_error) feed a circuit breaker and
+      are retried while the request deadline still has room and the breaker
+      is closed; any other error fails the request at once without touching
+      the breaker
+
+    `call_fn` is any `prompt -> str` callable, so a local stub model can be used
+    in place of Gemini.
+    """
+
+    def __init__(
+        self,
+        call_fn: Callable[[str], str],
+        max_concurrency: int = None,
+        max_queue: int = None,
+        queue_timeout: float = None,
+        call_timeout: float = None,
+        max_retries: int = None,
+        breaker_threshold: int = None,
+        breaker_cooldown: float = None,
+        is_transient: Callable[[Exception], bool] = is_transient_error,
+    ):
+        self.call_fn = call_fn
+        self.is_transient = is_transient
+        self.max_concurrency = settings.LLM_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.max_queue = settings.LLM_MAX_QUEUE if max_queue is None else max_queue
+        self.queue_timeout = settings.LLM_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.call_timeout = settings.LLM_CALL_TIMEOUT if call_timeout is None else call_timeout
+        self.max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.breaker = CircuitBreaker(
+            settings.LLM_BREAKER_THRESHOLD if breaker_threshold is None else breaker_threshold,
+            settings.LLM_BREAKER_COOLDOWN if breaker_cooldown is None else breaker_cooldown,
+        )
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        return {"waiting": self._waiting, "breaker": self.breaker.state, "failures": self.breaker.failures}
+
+    def _acquire(self, deadline: float):
+        # free slot: no queueing involved
+        if self._slots.acquire(blocking=False):
+            return
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                raise LLMOverloaded("LLM queue full")
+            self._waiting += 1
+        try:
+            if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise LLMOverloaded("LLM queue deadline exceeded")
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def _call_traced(self, prompt: str, trace) -> str:
+        with slow_sampler.attach(trace, "llm"):
+            return self.call_fn(prompt)
+
+    def _run_once(self, prompt: str, deadline: float) -> str:
+        if not self.breaker.allow():
+            # the breaker opens because the model keeps failing, not because of load
+            raise LLMUnavailable("LLM circuit breaker open")
+
+        try:
+            self._acquire(deadline)
+        except LLMUnavailable:
+            # not the model's fault; give the half-open trial back
+            self.breaker.release_trial()
+            raise
+
+        # hand the caller's request trace to the worker so slow-request profiles include the model call
+        future = self._executor.submit(self._call_traced, prompt, slow_sampler.current_trace())
+        future.add_done_callback(lambda _: self._slots.release())
+        # check done() rather than catching TimeoutError: a socket timeout
+        # raised inside call_fn is a TimeoutError too
+        wait([future], timeout=self.call_timeout)
+        if not future.done():
+            self.breaker.record_failure()
+            raise LLMOverloaded(f"LLM call timed out after {self.call_timeout}s")
+
+        exc = future.exception()
+        if exc is None:
+            self.breaker.record_success()
+            return future.result()
+        if not self.is_transient(exc):
+            # the model answered; this request is the problem
+            self.breaker.release_trial()
+            raise LLMUnavailable(f"LLM call rejected: {exc}") from exc
+        self.breaker.record_failure()
+        raise exc
+
+    def submit(self, prompt: str) -> str:
+        deadline = time.monotonic() + self.queue_timeout
+        attempt = 0
+        while True:
+            try:
+                return self._run_once(prompt, deadline)
+            except LLMUnavailable:
+                raise
+            except Exception as e:
+                attempt += 1
+                # retry budget: bounded count, within the original deadline, breaker still closed
+                out_of_budget = attempt > self.max_retries or time.monotonic() >= deadline
+                if out_of_budget or self.breaker.state != "closed":
+                    raise LLMUnavailable(f"LLM call failed: {e}")
@@ -0,0 +1,197 @@
+# app/services/profiler.py
+import os
+import sys
+import time
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from app.config import settings
+
+SAMPLER_THREAD_NAME = "slow-request-sampler"
+
+# Leaf frames that mean "blocked, not working": lock/condition waits, idle
+# queue consumers (anyio and concurrent.futures pool workers) and the event
+# loop parked in select. Samples ending here are dropped from CPU profiles.
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename
+    if path.startswith(settings.BASE_DIR):
+        path = os.path.relpath(path, settings.BASE_DIR)
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _collapse_frame(frame) -> str:
+    """Root-to-leaf stack of `frame` as one collapsed-stack key."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Brendan Gregg collapsed format ("a;b;c 12" per line), readable by flamegraph.pl / speedscope."""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+def capture_profile(seconds: float, interval: float = None) -> str:
+    """
+    Sample the threads of this worker for `seconds` and return the collapsed
+    stacks of those doing work. Idle waits (IDLE_LEAVES), the caller and the
+    slow-request sampler are skipped, so the result approximates a CPU
+    profile; threads blocked inside C calls such as socket reads still show
+    up, which is what exposes a slow Gemini call. Blocks the calling thread.
+    """
+    interval = interval or settings.PROFILE_SAMPLE_INTERVAL
+    own = threading.get_ident()
+    stacks = Counter()
+
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        # refreshed every round so threads started mid-capture get their name
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            thread = names.get(ident, f"thread-{ident}")
+            if ident == own or thread == SAMPLER_THREAD_NAME or _is_idle(frame):
+                continue
+            stacks[f"{thread};{_collapse_frame(frame)}"] += 1
+        time.sleep(interval)
+
+    return to_collapsed(stacks)
+
+
+class SlowRequestSampler:
+    """
+    Stack-samples tracked requests in the background and keeps the profile
+    and stage timings of any request slower than `threshold_ms` in a bounded
+    ring buffer. Fast requests are discarded.
+
+    Usage (in the thread handling the request):
+        with slow_sampler.track("/api/chat"):
+            with stage("retrieval"):
+                ...
+    """
+
+    def __init__(self, threshold_ms: float = None, capacity: int = None, interval: float = None):
+        self.threshold_ms = settings.SLOW_REQUEST_THRESHOLD_MS if threshold_ms is None else threshold_ms
+        self.interval = interval or settings.PROFILE_SAMPLE_INTERVAL
+        self.records = deque(maxlen=capacity or settings.SLOW_REQUEST_BUFFER)
+
+        self._active = {}  # thread ident -> (trace dict, stack prefix)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # -------------------------
+    # Background sampling
+    # -------------------------
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=SAMPLER_THREAD_NAME, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = dict(self._active)
+
+            frames = sys._current_frames()
+            for ident, (trace, prefix) in active.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    trace["stacks"][prefix + _collapse_frame(frame)] += 1
+            time.sleep(self.interval)
+
+    # -------------------------
+    # Request tracking
+    # -------------------------
+    @contextmanager
+    def track(self, name: str):
+        ident = threading.get_ident()
+        trace = {"name": name, "started_at": time.time(), "stages": [], "stacks": Counter()}
+        self._local.trace = trace
+        with self._lock:
+            self._active[ident] = (trace, "")
+            self._ensure_thread()
+
+        start = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._active.pop(ident, None)
+            self._local.trace = None
+
+            if duration_ms >= self.threshold_ms:
+                self.records.append({
+                    "name": name,
+                    "started_at": trace["started_at"],
+                    "duration_ms": round(duration_ms, 1),
+                    "stages": trace["stages"],
+                    "samples": sum(trace["stacks"].values()),
+                    "profile": to_collapsed(trace["stacks"]),
+                })
+                print(f"[PROFILE] Slow request {name}: {duration_ms:.0f} ms")
+
+    def current_trace(self):
+        """Trace of the request tracked on this thread, or None."""
+        return getattr(self._local, "trace", None)
+
+    @contextmanager
+    def attach(self, trace, label: str):
+        """
+        Sample the current (helper) thread into `trace` as well, with stacks
+        prefixed by `label`. Used by the LLM scheduler so a request's profile
+        includes the Gemini client frames running on its executor thread.
+        """
+        if trace is None:
+            yield
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            self._active[ident] = (trace, f"[{label}];")
+            self._ensure_thread()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active.pop(ident, None)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a named stage of the request tracked on this thread (no-op otherwise)."""
+        trace = getattr(self._local, "trace", None)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if trace is not None:
+                trace["stages"].append({"stage": name, "ms": round((time.perf_counter() - start) * 1000, 1)})
+
+    def recent(self) -> list:
+        return list(reversed(self.records))
+
+
+slow_sampler = SlowRequestSampler()
+stage = slow_sampler.stage
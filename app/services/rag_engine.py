@@ -2,13 +2,15 @@
 import os
 import json
 import math
-import traceback
 import google.generativeai as genai
 
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
 
 from app.config import settings
+from app.services.llm_scheduler import LLMScheduler, LLMUnavailable, LLMOverloaded
+from app.services.intent_router import IntentRouter, DOCUMENT, PROFILE
+from app.services.profiler import stage
 
 # configure Gemini safely (won't crash if key missing)
 try:
@@ -18,17 +20,23 @@ except Exception:
 
 
 class RAGService:
-    def __init__(self):
+    def __init__(self, model=None):
         # embeddings used by FAISS and by PDF matching
         self.embeddings = HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
         self.vector_store = None
         self.load_db()
 
-        # Gemini model wrapper
-        try:
-            self.model = genai.GenerativeModel("gemini-2.0-flash")
-        except Exception:
-            self.model = None
+        # Gemini model wrapper (pass `model` to use a local stub instead)
+        if model is not None:
+            self.model = model
+        else:
+            try:
+                self.model = genai.GenerativeModel("gemini-2.0-flash")
+            except Exception:
+                self.model = None
+
+        # bounded concurrency + queue deadlines + circuit breaker in front of the LLM
+        self.llm_scheduler = LLMScheduler(self._call_llm)
 
         # file map (list format produced by ingestion)
         self.map_path = os.path.join(settings.BASE_DIR, "data", "file_maps.json")
@@ -38,7 +46,10 @@ class RAGService:
         # cache of embeddings for files {saved_path: {text_emb: [...], name_emb: [...]} }
         self._file_emb_cache = {}
 
-        # keywords to detect file intent
+        # embedding-based intent routing (document / general / profile fact)
+        self.intent_router = IntentRouter(self.embeddings.embed_documents)
+
+        # keywords to detect file intent (fallback when embeddings are unavailable)
         self.pdf_keywords = [
             "pdf", "document", "file", "syllabus", "hod", "hod list",
             "prospectus", "brochure", "seat matrix", "vacant", "admission",
@@ -150,17 +161,19 @@ class RAGService:
     # -------------------------
     # Find best PDF (one)
     # -------------------------
-    def find_best_pdf(self, query: str):
+    def find_best_pdf(self, query: str, q_emb=None):
         """
         Return the best matching file entry (or None).
         Scoring: semantic similarity between query and file text (primary),
                  plus filename lexical boost.
+        Pass `q_emb` to reuse an already computed query embedding.
         """
         if not self.file_entries:
             return None
 
         # embed query
-        q_emb = self._embed_text(query)
+        if q_emb is None:
+            q_emb = self._embed_text(query)
 
         best = None
         best_score = -1.0
@@ -220,29 +233,45 @@ class RAGService:
         if not self.model:
             raise RuntimeError("LLM not configured")
 
-        try:
-            # try generate_content
-            resp = self.model.generate_content(prompt)
-            # try common fields
-            if hasattr(resp, "text") and resp.text:
-                return resp.text
-            if hasattr(resp, "candidates") and resp.candidates:
-                try:
-                    return resp.candidates[0].content.parts[0].text
-                except Exception:
-                    return str(resp.candidates[0])
-            # fallback
-            return str(resp)
-        except Exception as e:
-            # try generate_text as fallback
+        # single attempt; retries/timeouts are budgeted by self.llm_scheduler.
+        # A safety-blocked response raises ValueError on resp.text, which the
+        # scheduler treats as a request error (no retry, breaker untouched).
+        resp = self.model.generate_content(prompt)
+        # try common fields
+        if hasattr(resp, "text") and resp.text:
+            return resp.text
+        if hasattr(resp, "candidates") and resp.candidates:
             try:
-                resp = self.model.generate_text(prompt)
-                if hasattr(resp, "text"):
-                    return resp.text
-                return str(resp)
+                return resp.candidates[0].content.parts[0].text
             except Exception:
-                # bubble up a simplified error
-                raise RuntimeError(f"LLM call failed: {e}\n{traceback.format_exc()}")
+                return str(resp.candidates[0])
+        # fallback
+        return str(resp)
+
+    # -------------------------
+    # Degraded answer (no LLM)
+    # -------------------------
+    def _fallback_answer(self, context_parts: list, overloaded: bool) -> str:
+        """
+        Fast retrieval-only answer used when the LLM is overloaded or failing:
+        top retrieved chunks followed by the college profile.
+        """
+        if overloaded:
+            header = "I'm under heavy load right now, so here is the most relevant information I found:"
+        else:
+            header = "I can't reach the AI model right now, so here is the most relevant information I found:"
+
+        snippets = []
+        for part in context_parts[:2]:
+            text = part.strip()
+            if len(text) > 400:
+                text = text[:400].rsplit(" ", 1)[0] + "..."
+            snippets.append(f"- {text}")
+
+        profile = [line.strip() for line in settings.COLLEGE_PROFILE.strip().splitlines()[1:]]
+        facts = "College facts:\n" + "\n".join(line for line in profile if line)
+
+        return "\n\n".join(part for part in [header, "\n".join(snippets), facts] if part)
 
     # -------------------------
     # Main: get_answer
@@ -252,10 +281,24 @@ class RAGService:
         if not query:
             return {"answer": "Please ask something.", "files": [], "sources": []}
 
+        # embed once; reused for routing, PDF matching and FAISS retrieval
+        with stage("embed"):
+            q_emb = self._embed_text(query)
+        with stage("route"):
+            route = self.intent_router.route(q_emb)
+
+        # 0) College profile facts: answer directly, no retrieval or LLM
+        #    (otherwise the query takes the normal RAG path below)
+        if route and route["intent"] == PROFILE and self.intent_router.can_answer_directly(query, history):
+            answer_text = self.intent_router.answer_fact(route["fact"])
+            return {"answer": answer_text, "files": [], "sources": []}
+
         # 1) If user asked for a file, try to find best PDF
+        wants_file = route["intent"] == DOCUMENT if route else self.is_pdf_query(query)
         try:
-            if self.is_pdf_query(query):
-                best = self.find_best_pdf(query)
+            if wants_file:
+                with stage("pdf_match"):
+                    best = self.find_best_pdf(query, q_emb)
                 if best:
                     # build URL - we will serve via static mount /files -> settings.UPLOAD_DIR
                     saved = best.get("saved_path") or best.get("original_name")
@@ -276,16 +319,20 @@ class RAGService:
         sources = []
         if self.vector_store:
             try:
-                docs = self.vector_store.similarity_search_with_score(query, k=4)
+                with stage("retrieval"):
+                    if q_emb is not None:
+                        docs = self.vector_store.similarity_search_with_score_by_vector(q_emb, k=4)
+                    else:
+                        docs = self.vector_store.similarity_search_with_score(query, k=4)
             except Exception:
                 docs = []
 
             for doc, score in docs:
                 # include all retrieved; optionally filter by score
                 context_parts.append(doc.page_content)
-                src = doc.metadata.get("source", None)
-                if src:
-                    sources.append(src)
+                # deduped chunks carry every file they were found in
+                srcs = doc.metadata.get("sources") or [doc.metadata.get("source", None)]
+                sources.extend(s for s in srcs if s)
 
         context_str = "\n\n".join(context_parts)
 
@@ -303,8 +350,14 @@ College profile:
         full_prompt = f"{system_prompt}\n\nContext:\n{context_str}\n\nChat history:\n{history}\n\nUser: {query}"
 
         try:
-            answer = self._call_llm(full_prompt)
-        except Exception:
-            answer = "I'm having trouble generating a response right now."
+            if not self.model:
+                # misconfiguration, not load: don't let it trip the breaker
+                raise LLMUnavailable("LLM not configured")
+            with stage("llm"):
+                answer = self.llm_scheduler.submit(full_prompt)
+        except LLMUnavailable as e:
+            print(f"[LLM] Degraded answer: {e}")
+            answer = self._fallback_answer(context_parts, overloaded=isinstance(e, LLMOverloaded))
+            return {"answer": answer, "files": [], "sources": list(set(sources)), "degraded": True}
 
         return {"answer": answer, "files": [], "sources": list(set(sources))}
@@ -1,8 +1,9 @@
 import os
 import shutil
+import threading
 from typing import List
 from fastapi import FastAPI, Request, UploadFile, File, HTTPException, Header, Depends
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
@@ -11,6 +12,7 @@ from fastapi.responses import FileResponse
 from app.services.crawler import CrawlerService
 from app.services.ingestor import IngestionService
 from app.services.rag_engine import RAGService
+from app.services.profiler import slow_sampler, capture_profile, stage
 from app.config import settings
 
 app = FastAPI(title="CampusMate AI")
@@ -30,6 +32,9 @@ crawler = CrawlerService()
 ingestor = IngestionService()
 rag = RAGService()
 
+# One retrain at a time: it rewrites file_maps.json, the FAISS index and chunks.json
+retrain_lock = threading.Lock()
+
 # --- SECURITY GUARD ---
 async def verify_admin(x_admin_password: str = Header(...)):
     """
@@ -53,11 +58,14 @@ class CrawlRequest(BaseModel):
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+# sync handler: FastAPI runs it in its threadpool so blocking retrieval/LLM
+# calls don't stall the event loop and the LLM scheduler can queue them
 @app.post("/api/chat")
-async def chat_endpoint(request: ChatRequest):
+def chat_endpoint(request: ChatRequest):
     if not request.query:
         raise HTTPException(status_code=400, detail="Query cannot be empty")
-    return rag.get_answer(request.query, request.history)
+    with slow_sampler.track("/api/chat"):
+        return rag.get_answer(request.query, request.history)
 
 # --- PROTECTED Admin Routes ---
 # Notice: dependencies=[Depends(verify_admin)] locks these routes
@@ -87,13 +95,40 @@ async def upload_pdf(file: UploadFile = File(...)):
 
 
 @app.post("/api/admin/retrain", dependencies=[Depends(verify_admin)])
-async def retrain_knowledge_base():
+def retrain_knowledge_base():
+    if not retrain_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Retrain already running")
     try:
-        ingestor.build_vector_store()
-        rag.reload_db() 
-        return {"status": "success", "message": "Knowledge base updated."}
+        with slow_sampler.track("/api/admin/retrain"):
+            stats = ingestor.build_vector_store()
+            with stage("reload_db"):
+                rag.reload_db()
+        return {"status": "success", "message": "Knowledge base updated.", "ingest": stats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        retrain_lock.release()
+
+
+@app.get("/api/admin/llm-status", dependencies=[Depends(verify_admin)])
+async def llm_status():
+    """Queue depth and circuit breaker state of the LLM scheduler"""
+    return rag.llm_scheduler.stats()
+
+@app.get("/api/admin/profile", dependencies=[Depends(verify_admin)], response_class=PlainTextResponse)
+def profile_worker(seconds: float = 10):
+    """
+    Sample all threads of this worker for N seconds.
+    Returns collapsed stacks (feed to flamegraph.pl or speedscope).
+    """
+    if seconds <= 0 or seconds > settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {settings.PROFILE_MAX_SECONDS}]")
+    return capture_profile(seconds)
+
+@app.get("/api/admin/slow-requests", dependencies=[Depends(verify_admin)])
+async def slow_requests():
+    """Most recent slow /api/chat and /api/admin/retrain calls, newest first"""
+    return {"threshold_ms": slow_sampler.threshold_ms, "requests": slow_sampler.recent()}
 
 
 @app.get("/files/{file_path:path}")
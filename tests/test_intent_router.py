@@ -0,0 +1,65 @@
+# tests/test_intent_router.py
+import pytest
+
+from app.config import settings
+from app.services.intent_router import IntentRouter, DOCUMENT, GENERAL, PROFILE, parse_profile
+
+
+def test_parse_profile_collects_bullets():
+    facts = parse_profile(settings.COLLEGE_PROFILE)
+    assert facts["Principal"] == "Dr. B.M. Patil"
+    assert "Data Science (DS)" in facts["Departments/Branches Offered"]
+
+
+@pytest.mark.parametrize("query, history, expected", [
+    ("who is the principal", [], True),
+    ("what is the college address", None, True),
+    ("who is the principal", ["User: hi", "AI: hello"], False),
+    ("प्राचार्य कोण आहेत?", [], False),
+    ("who is the principal of the polytechnic", [], False),
+    ("who is the HOD of CSE", [], False),
+    ("head of civil department", [], False),
+])
+def test_shortcut_guard(query, history, expected):
+    router = IntentRouter(lambda texts: [])
+    assert router.can_answer_directly(query, history) is expected
+
+
+# Labelled routing check against the real embedding model; this is the
+# evidence for INTENT_FACT_THRESHOLD / INTENT_MARGIN. Skipped when the model
+# is not installed.
+LABELLED = [
+    ("who is the principal of sycet?", PROFILE, "Principal"),
+    ("college address please", PROFILE, "Address"),
+    ("what is the official website", PROFILE, "Website"),
+    ("which branches can I study here", PROFILE, "Departments/Branches Offered"),
+    ("what are the admission dates?", GENERAL, None),
+    ("is there a hostel for girls", GENERAL, None),
+    ("what is the placement record", GENERAL, None),
+    ("download the second year syllabus", DOCUMENT, None),
+    ("send me the fee structure pdf", DOCUMENT, None),
+    ("I want the prospectus", DOCUMENT, None),
+]
+
+
+@pytest.fixture(scope="module")
+def model_router():
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    try:
+        model = sentence_transformers.SentenceTransformer(settings.EMBEDDING_MODEL)
+    except Exception as e:
+        pytest.skip(f"embedding model unavailable: {e}")
+
+    def embed(texts):
+        return [list(v) for v in model.encode(texts)]
+
+    return IntentRouter(embed), embed
+
+
+@pytest.mark.parametrize("query, intent, fact", LABELLED)
+def test_labelled_routing(model_router, query, intent, fact):
+    router, embed = model_router
+    route = router.route(embed([query])[0])
+    assert route["intent"] == intent
+    if fact:
+        assert route["fact"] == fact
@@ -0,0 +1,121 @@
+# tests/test_llm_scheduler.py
+import threading
+import time
+
+import pytest
+
+from app.services.llm_scheduler import LLMScheduler, LLMUnavailable, LLMOverloaded
+
+
+class StubModel:
+    """Local stand-in for Gemini: fails `failures` times with `error`, optionally blocks on `gate`."""
+
+    def __init__(self, failures=0, error=ConnectionError("unavailable"), gate=None):
+        self.failures = failures
+        self.error = error
+        self.gate = gate
+        self.calls = 0
+
+    def __call__(self, prompt):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait()
+        if self.calls <= self.failures:
+            raise self.error
+        return f"ok: {prompt}"
+
+
+def hold_slot(scheduler, gate):
+    """Occupy one scheduler slot until `gate` is set."""
+    thread = threading.Thread(target=scheduler.submit, args=("hold",), daemon=True)
+    thread.start()
+    while scheduler._slots._value > 0:
+        time.sleep(0.005)
+    return thread
+
+
+def test_free_slot_needs_no_queue():
+    scheduler = LLMScheduler(StubModel(), max_queue=0)
+    assert scheduler.submit("x") == "ok: x"
+
+
+def test_queue_full_is_overloaded():
+    gate = threading.Event()
+    scheduler = LLMScheduler(StubModel(gate=gate), max_concurrency=1, max_queue=0)
+    hold_slot(scheduler, gate)
+    with pytest.raises(LLMOverloaded, match="queue full"):
+        scheduler.submit("x")
+    gate.set()
+
+
+def test_queue_deadline_is_overloaded():
+    gate = threading.Event()
+    scheduler = LLMScheduler(StubModel(gate=gate), max_concurrency=1, max_queue=1, queue_timeout=0.05)
+    hold_slot(scheduler, gate)
+    with pytest.raises(LLMOverloaded, match="deadline"):
+        scheduler.submit("x")
+    gate.set()
+
+
+def test_breaker_opens_then_half_opens_then_closes():
+    model = StubModel(failures=2)
+    scheduler = LLMScheduler(model, max_retries=0, breaker_threshold=2, breaker_cooldown=0.1)
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            scheduler.submit("x")
+    assert scheduler.breaker.state == "open"
+
+    # open breaker is a model problem, not load
+    with pytest.raises(LLMUnavailable) as excinfo:
+        scheduler.submit("x")
+    assert not isinstance(excinfo.value, LLMOverloaded)
+    assert model.calls == 2
+
+    time.sleep(0.15)
+    assert scheduler.breaker.state == "half-open"
+    assert scheduler.submit("x") == "ok: x"
+    assert scheduler.breaker.state == "closed"
+
+
+def test_transient_error_uses_retry_budget():
+    model = StubModel(failures=1)
+    assert LLMScheduler(model, max_retries=1).submit("x") == "ok: x"
+    assert model.calls == 2
+
+    model = StubModel(failures=1)
+    with pytest.raises(LLMUnavailable):
+        LLMScheduler(model, max_retries=0).submit("x")
+    assert model.calls == 1
+
+
+def test_timeout_raised_by_model_is_retried_not_overload():
+    model = StubModel(failures=2, error=TimeoutError("socket timeout"))
+    with pytest.raises(LLMUnavailable) as excinfo:
+        LLMScheduler(model, max_retries=1).submit("x")
+    assert not isinstance(excinfo.value, LLMOverloaded)
+    assert model.calls == 2
+
+
+def test_request_error_is_not_retried_and_spares_breaker():
+    model = StubModel(failures=5, error=ValueError("response blocked by safety filters"))
+    scheduler = LLMScheduler(model, max_retries=3, breaker_threshold=1)
+    with pytest.raises(LLMUnavailable, match="rejected"):
+        scheduler.submit("x")
+    assert model.calls == 1
+    assert scheduler.breaker.state == "closed"
+
+
+def test_timed_out_call_keeps_its_slot():
+    gate = threading.Event()
+    scheduler = LLMScheduler(StubModel(gate=gate), max_concurrency=1, max_queue=0, call_timeout=0.05)
+
+    with pytest.raises(LLMOverloaded, match="timed out"):
+        scheduler.submit("x")
+    # the abandoned call is still running, so the only slot is taken
+    with pytest.raises(LLMOverloaded, match="queue full"):
+        scheduler.submit("x")
+
+    gate.set()
+    scheduler._executor.shutdown(wait=True)
+    assert scheduler._slots.acquire(blocking=False)